@@ -3,33 +3,40 @@
 # It then prints the data to the console in a readable format.
 # NOTE: This is not a realtime script, it is just a check.
 
+import numpy as np
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
 # To get karachi's data using Open-Meteo.com, you have to use coordinates.
 LATITUDE = 24.86
 LONGITUDE = 67.01
 
+# One pooled session for both API calls, so the connection is reused instead
+# of doing a fresh TCP + TLS handshake per request.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4))
+
+# Category boundaries and labels for np.digitize — value <= bound falls into
+# that bucket, anything above the last bound is "Hazardous".
+_AQI_BOUNDS = np.array([50, 100, 150, 200, 300])
+_AQI_LABELS = np.array([
+    "Good", "Moderate", "Unhealthy for Sensitive Groups",
+    "Unhealthy", "Very Unhealthy", "Hazardous"
+])
+
 def get_aqi_category(aqi):
     """
-    This just converts the AQI value into a category name. 
+    This just converts the AQI value into a category name.
     NOTE: AQI is actually returned as a number, this function is just converting it to a category.
+    Uses a branchless np.digitize lookup, so it also works on whole arrays of
+    AQI values if we ever label the full history in one go.
     """
-
-    if 0 <= aqi <= 50:
-        return "Good"
-    elif 51 <= aqi <= 100:
-        return "Moderate"
-    elif 101 <= aqi <= 150:
-        return "Unhealthy for Sensitive Groups"
-    elif 151 <= aqi <= 200:
-        return "Unhealthy"
-    elif 201 <= aqi <= 300:
-        return "Very Unhealthy"
-    elif aqi > 300:
-        return "Hazardous"
-    else:
+    if aqi is None:
+        return "Unknown"
+    if np.isscalar(aqi) and aqi < 0:
         return "Unknown"
+    return _AQI_LABELS[np.digitize(aqi, _AQI_BOUNDS, right=True)]
 
 def get_and_print_current_data(latitude, longitude):
     """
@@ -50,7 +57,7 @@ def get_and_print_current_data(latitude, longitude):
             "current": "temperature_2m,relative_humidity_2m,wind_speed_10m",
             "timezone": "Asia/Karachi"
         }
-        weather_response = requests.get(weather_url, params=weather_params)
+        weather_response = SESSION.get(weather_url, params=weather_params, timeout=(3, 10))
         weather_response.raise_for_status()
         current_weather = weather_response.json()['current']
     except Exception as e:
@@ -65,7 +72,7 @@ def get_and_print_current_data(latitude, longitude):
             "current": "pm10,pm2_5,carbon_monoxide,nitrogen_dioxide,us_aqi",
             "timezone": "Asia/Karachi"
         }
-        aq_response = requests.get(aq_url, params=aq_params)
+        aq_response = SESSION.get(aq_url, params=aq_params, timeout=(3, 10))
         aq_response.raise_for_status()
         current_aq = aq_response.json()['current']
     except Exception as e:
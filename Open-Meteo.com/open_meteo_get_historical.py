@@ -1,3 +1,4 @@
+import orjson
 import requests
 import pandas as pd
 from datetime import date, timedelta
@@ -38,9 +39,7 @@ def fetch_and_save_hourly_data(latitude, longitude, start_date, end_date, filena
     try:
         aq_response = requests.get(aq_url, params=aq_params)
         aq_response.raise_for_status()
-        aq_data = aq_response.json()['hourly']
-        df_aq = pd.DataFrame(aq_data)
-        df_aq.rename(columns={'time': 'timestamp'}, inplace=True)
+        aq_data = orjson.loads(aq_response.content)['hourly']
         print("-> OK: Air Quality data fetched.")
     except Exception as e:
         print(f"!!! FATAL ERROR fetching Air Quality data: {e}")
@@ -64,9 +63,7 @@ def fetch_and_save_hourly_data(latitude, longitude, start_date, end_date, filena
     try:
         weather_response = requests.get(weather_url, params=weather_params)
         weather_response.raise_for_status()
-        weather_data = weather_response.json()['hourly']
-        df_weather = pd.DataFrame(weather_data)
-        df_weather.rename(columns={'time': 'timestamp'}, inplace=True)
+        weather_data = orjson.loads(weather_response.content)['hourly']
         print("-> OK: Weather data fetched.")
     except Exception as e:
         print(f"!!! FATAL ERROR fetching Weather data: {e}")
@@ -74,24 +71,39 @@ def fetch_and_save_hourly_data(latitude, longitude, start_date, end_date, filena
             print("API Server Response:", weather_response.text)
         return False
 
-    # 3. --- Merge and Save ---
-    print("\nStep 3: Merging data...")
-    # Convert timestamp columns to datetime objects to ensure a perfect merge
-    df_aq['timestamp'] = pd.to_datetime(df_aq['timestamp'])
-    df_weather['timestamp'] = pd.to_datetime(df_weather['timestamp'])
+    # 3. --- Combine and Save ---
+    print("\nStep 3: Combining data...")
+    # Both endpoints return the same hourly time grid for the same date range,
+    # so the columns can be zipped straight into one DataFrame — no merge, no
+    # double pd.to_datetime, no intermediate frames.
+    if aq_data['time'] == weather_data['time']:
+        df_merged = pd.DataFrame({
+            'timestamp': pd.to_datetime(aq_data['time'], format='%Y-%m-%dT%H:%M'),
+            'pm10': aq_data['pm10'],
+            'pm25': aq_data['pm2_5'],
+            'carbon_monoxide': aq_data['carbon_monoxide'],
+            'nitrogen_dioxide': aq_data['nitrogen_dioxide'],
+            'aqi': aq_data['us_aqi'],
+            'temperature': weather_data['temperature_2m'],
+            'humidity': weather_data['relative_humidity_2m'],
+            'wind_speed': weather_data['wind_speed_10m'],
+        })
+    else:
+        # Fall back to a proper join if the two APIs ever disagree on the grid.
+        print("!!! WARNING: Time axes differ between the two APIs, merging on timestamp instead.")
+        df_aq = pd.DataFrame(aq_data).rename(columns={'time': 'timestamp'})
+        df_weather = pd.DataFrame(weather_data).rename(columns={'time': 'timestamp'})
+        df_aq['timestamp'] = pd.to_datetime(df_aq['timestamp'], format='%Y-%m-%dT%H:%M')
+        df_weather['timestamp'] = pd.to_datetime(df_weather['timestamp'], format='%Y-%m-%dT%H:%M')
+        df_merged = pd.merge(df_aq, df_weather, on='timestamp')
+        df_merged.rename(columns={
+            'pm2_5': 'pm25',
+            'us_aqi': 'aqi',
+            'temperature_2m': 'temperature',
+            'relative_humidity_2m': 'humidity',
+            'wind_speed_10m': 'wind_speed'
+        }, inplace=True)
 
-    # Merge the two DataFrames on the common 'timestamp' column
-    df_merged = pd.merge(df_aq, df_weather, on='timestamp')
-    
-    # Clean up column names
-    df_merged.rename(columns={
-        'pm2_5': 'pm25',
-        'us_aqi': 'aqi',
-        'temperature_2m': 'temperature',
-        'relative_humidity_2m': 'humidity',
-        'wind_speed_10m': 'wind_speed'
-    }, inplace=True)
-    
     # Save the final, merged hourly data
     df_merged.to_csv(filename, index=False)
     
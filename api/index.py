@@ -1,15 +1,33 @@
 import pandas as pd
 import numpy as np
 import joblib
+import orjson
 import requests
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Imported for its side effect: joblib.load needs the WeightedEnsemble class
+# importable under its pickled module path ("ensemble") to rebuild the model.
+from ensemble import WeightedEnsemble
 
 
 MODEL_FILE = 'models/MAIN MODEL.joblib'
+# Optional compiled fast path: if an ONNX export of the model is shipped next
+# to the joblib file (and onnxruntime is installed), predictions run through
+# native tree traversal instead of sklearn's Python-level ensemble loop.
+ONNX_MODEL_FILE = 'models/MAIN MODEL.onnx'
 HISTORICAL_DATA_FILE = 'data/karachi_daily_data_5_years.csv'
+# Written by append_and_clean_historical_data.py; loads much faster than the
+# CSV and keeps the timestamp dtype, so it is preferred when present.
+HISTORICAL_PARQUET_FILE = 'data/karachi_daily_data_5_years.parquet'
 TIMEZONE = 'Asia/Karachi'
 LATITUDE = 24.86
 LONGITUDE = 67.01
@@ -18,7 +36,8 @@ LONGITUDE = 67.01
 app = FastAPI(
     title="Pearls AQI Predictor API",
     description="An API to provide today's AQI and a 3-day forecast.",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -34,94 +53,288 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# A single pooled session for all Open-Meteo calls. Re-using the session keeps
+# the TLS connection warm across requests instead of paying a fresh handshake
+# for every GET.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                       max_retries=Retry(total=2, backoff_factor=0.2)))
+
+
+def _get_json(url, params):
+    """Fetches a URL through the pooled session and returns the parsed JSON."""
+    # orjson decodes the raw bytes directly and is ~2-3x faster than the
+    # stdlib json path used by Response.json() on these float-heavy payloads.
+    return orjson.loads(_SESSION.get(url, params=params, timeout=(3, 10)).content)
+
+
+# Module-level caches for the model and the historical data.
+# Reloading the joblib file and re-parsing the 5-year CSV on every request was
+# the biggest chunk of /api/forecast latency, so we load them once here and
+# only reload when the file on disk actually changes (checked via mtime).
+_MODEL = None
+_MODEL_MTIME = None
+_MODEL_FEATURES = None
+_FEATURE_INDEX = None
+_HISTORY = None
+_HISTORY_MTIME = None
+_ONNX_SESSION = None
+_ONNX_INPUT_NAME = None
+_ONNX_MTIME = None
+# Set once per loaded model after the first forecast iteration has proven the
+# feature builder covers every model feature (see generate_full_response).
+_FEATURE_COVERAGE_CHECKED = False
+
+# Explicit schema for the CSV fallback load: restricting the read to these
+# columns and pinning their dtypes skips pandas' inference pass over the full
+# file, and float32 halves the memory the cached history occupies.
+_HISTORY_COLS = ['timestamp', 'pm10', 'pm25', 'carbon_monoxide', 'nitrogen_dioxide',
+                 'temperature', 'humidity', 'wind_speed', 'aqi']
+_HISTORY_DTYPES = {col: 'float32' for col in _HISTORY_COLS if col != 'timestamp'}
+
+
+def get_cached_model_and_history():
+    """
+    Returns the cached model and historical DataFrame, reloading from disk
+    only if the underlying files have been updated (e.g. by the daily retrain).
+    The history is kept pre-sorted by timestamp so callers can just slice the tail.
+    """
+    global _MODEL, _MODEL_MTIME, _MODEL_FEATURES, _FEATURE_INDEX, _HISTORY, _HISTORY_MTIME
+    global _ONNX_SESSION, _ONNX_INPUT_NAME, _ONNX_MTIME, _FEATURE_COVERAGE_CHECKED
+
+    model_mtime = os.path.getmtime(MODEL_FILE)
+    if _MODEL is None or model_mtime != _MODEL_MTIME:
+        print("--- Loading model from disk (cache miss) ---")
+        # The model file is LZ4-compressed now, so it has to be decompressed
+        # into memory on load (joblib ignores mmap_mode for compressed
+        # archives) — the smaller artifact reads off disk much faster.
+        _MODEL = joblib.load(MODEL_FILE)
+        _MODEL_FEATURES = _MODEL.feature_names_in_
+        _FEATURE_INDEX = {name: i for i, name in enumerate(_MODEL_FEATURES)}
+        _MODEL_MTIME = model_mtime
+        # A fresh model may expect features this process hasn't proven it can
+        # build, so re-arm the coverage check.
+        _FEATURE_COVERAGE_CHECKED = False
+
+    if os.path.exists(ONNX_MODEL_FILE):
+        onnx_mtime = os.path.getmtime(ONNX_MODEL_FILE)
+        if _ONNX_SESSION is None or onnx_mtime != _ONNX_MTIME:
+            try:
+                import onnxruntime as ort
+                _ONNX_SESSION = ort.InferenceSession(ONNX_MODEL_FILE, providers=['CPUExecutionProvider'])
+                _ONNX_INPUT_NAME = _ONNX_SESSION.get_inputs()[0].name
+                _ONNX_MTIME = onnx_mtime
+                print("--- Using ONNX Runtime for predictions ---")
+            except Exception as e:
+                print(f"!!! WARNING: Could not load ONNX model, using joblib model instead: {e}")
+                _ONNX_SESSION = None
+
+    if os.path.exists(HISTORICAL_PARQUET_FILE):
+        history_path = HISTORICAL_PARQUET_FILE
+    else:
+        history_path = HISTORICAL_DATA_FILE
+    history_mtime = os.path.getmtime(history_path)
+    if _HISTORY is None or history_mtime != _HISTORY_MTIME:
+        print(f"--- Loading historical data from '{history_path}' (cache miss) ---")
+        if history_path == HISTORICAL_PARQUET_FILE:
+            # The append step writes the Parquet file already sorted by
+            # timestamp, so no re-sort is needed here.
+            _HISTORY = pd.read_parquet(history_path).reset_index(drop=True)
+        else:
+            _HISTORY = pd.read_csv(history_path, usecols=_HISTORY_COLS, dtype=_HISTORY_DTYPES, parse_dates=['timestamp'])
+            _HISTORY = _HISTORY.sort_values('timestamp', ignore_index=True)
+        _HISTORY_MTIME = history_mtime
+
+    return _MODEL, _HISTORY
+
+
+# Open-Meteo only refreshes its forecasts hourly, so repeated hits within a
+# short window can be answered from these tiny in-process response caches
+# instead of re-running the whole pipeline (network + model) every time.
+FORECAST_CACHE_TTL_SECONDS = 900
+STATUS_CACHE_TTL_SECONDS = 60
+# Upstream forecasts change at most hourly, so the fetched forecast frame
+# itself is cached for that long — the response cache above is shorter since
+# the "today" value also depends on the historical file.
+FUTURE_FORECAST_TTL_SECONDS = 3600
+_FORECAST_CACHE = {'expires': 0.0, 'response': None}
+_STATUS_CACHE = {'expires': 0.0, 'response': None}
+_FUTURE_FORECAST_CACHE = {'expires': 0.0, 'forecast': None}
+
+
+def predict_single_day(model, feature_vector):
+    """
+    Runs a one-row prediction, preferring the compiled ONNX session when one
+    was loaded and falling back to the sklearn model otherwise.
+    """
+    if _ONNX_SESSION is not None:
+        x = feature_vector.astype(np.float32).reshape(1, -1)
+        return float(_ONNX_SESSION.run(None, {_ONNX_INPUT_NAME: x})[0][0])
+    return float(model.predict(feature_vector.reshape(1, -1))[0])
+
+
+# Warm the cache at import time so the first request doesn't pay the load cost.
+try:
+    get_cached_model_and_history()
+except Exception as e:
+    print(f"!!! WARNING: Could not pre-load model/data at startup: {e}")
+
 # This is the main prediction logic
 
 def get_future_forecast_from_api():
     """Fetches and prepares the forecast for the next 3 days."""
+    now = time.time()
+    if _FUTURE_FORECAST_CACHE['forecast'] is not None and now < _FUTURE_FORECAST_CACHE['expires']:
+        print("--- Serving future forecast data from cache ---")
+        return _FUTURE_FORECAST_CACHE['forecast']
+
     print("--- Fetching Future Forecast Data ---")
     try:
         FORECAST_DAYS = 4
         weather_url = "https://api.open-meteo.com/v1/forecast"
         weather_params = {"latitude": LATITUDE, "longitude": LONGITUDE, "daily": "temperature_2m_mean,relative_humidity_2m_mean,wind_speed_10m_mean", "forecast_days": FORECAST_DAYS, "timezone": TIMEZONE}
-        weather_json = requests.get(weather_url, params=weather_params).json()
-        
+
         aq_url = "https://air-quality-api.open-meteo.com/v1/air-quality"
         aq_params = {"latitude": LATITUDE, "longitude": LONGITUDE, "hourly": "pm10,pm2_5,carbon_monoxide,nitrogen_dioxide", "forecast_days": FORECAST_DAYS, "timezone": TIMEZONE}
-        aq_json = requests.get(aq_url, params=aq_params).json()
-
-        df_weather_daily = pd.DataFrame(weather_json['daily'])
-        df_weather_daily.rename(columns={'time': 'timestamp'}, inplace=True)
-        df_weather_daily['timestamp'] = pd.to_datetime(df_weather_daily['timestamp'])
-        
-        df_aq_hourly = pd.DataFrame(aq_json['hourly'])
-        df_aq_hourly.rename(columns={'time': 'timestamp'}, inplace=True)
-        df_aq_hourly['timestamp'] = pd.to_datetime(df_aq_hourly['timestamp'])
-        df_aq_hourly.set_index('timestamp', inplace=True)
-        
-        pollutant_columns = ['pm10', 'pm2_5', 'carbon_monoxide', 'nitrogen_dioxide']
-        df_aq_daily = df_aq_hourly[pollutant_columns].resample('D').mean()
-        
-        forecast_df = pd.merge(df_weather_daily.set_index('timestamp'), df_aq_daily, left_index=True, right_index=True)
-        forecast_df.rename(columns={'temperature_2m_mean': 'temperature', 'relative_humidity_2m_mean': 'humidity', 'wind_speed_10m_mean': 'wind_speed', 'pm2_5': 'pm25'}, inplace=True)
-        
+
+        # The two calls are independent, so fire them concurrently and wait for
+        # both — wall time becomes max(weather, aq) instead of weather + aq.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            weather_future = executor.submit(_get_json, weather_url, weather_params)
+            aq_future = executor.submit(_get_json, aq_url, aq_params)
+            weather_json = weather_future.result()
+            aq_json = aq_future.result()
+
+        # Average the hourly pollutant arrays straight from the JSON. Each one
+        # is exactly FORECAST_DAYS * 24 values, so a reshape + nanmean gives
+        # the daily means without building an hourly DataFrame, resampling,
+        # and merging it back onto the weather frame.
+        hourly = aq_json['hourly']
+        daily_pollutants = {}
+        for pollutant in ['pm10', 'pm2_5', 'carbon_monoxide', 'nitrogen_dioxide']:
+            values = np.asarray(hourly[pollutant], dtype=np.float32)
+            daily_pollutants[pollutant] = np.nanmean(values.reshape(FORECAST_DAYS, 24), axis=1)
+
+        # Convert the JSON lists to float32 ndarrays up front and hand them to
+        # the constructor with copy=False, so the frame adopts the arrays
+        # as-is instead of re-inferring dtypes column by column.
+        daily = weather_json['daily']
+        forecast_df = pd.DataFrame({
+            'temperature': np.asarray(daily['temperature_2m_mean'], dtype=np.float32),
+            'humidity': np.asarray(daily['relative_humidity_2m_mean'], dtype=np.float32),
+            'wind_speed': np.asarray(daily['wind_speed_10m_mean'], dtype=np.float32),
+            'pm10': daily_pollutants['pm10'],
+            'pm25': daily_pollutants['pm2_5'],
+            'carbon_monoxide': daily_pollutants['carbon_monoxide'],
+            'nitrogen_dioxide': daily_pollutants['nitrogen_dioxide'],
+        }, index=pd.to_datetime(daily['time'], format='%Y-%m-%d'), copy=False)
+
         future_days_only = forecast_df.iloc[1:]
         print(f"-> OK: Future forecast data fetched for the next {len(future_days_only)} days.")
+        _FUTURE_FORECAST_CACHE['forecast'] = future_days_only
+        _FUTURE_FORECAST_CACHE['expires'] = now + FUTURE_FORECAST_TTL_SECONDS
         return future_days_only
     except Exception as e:
+        # Failed fetches are never cached, so the next call retries.
         print(f"!!! FATAL: An error occurred during API fetch: {e}")
         return None
 
-def create_features_for_single_day(forecast_row, history_df):
+# The columns whose history the rolling features are computed over.
+ROLLING_COLS = ['aqi', 'pm25', 'carbon_monoxide', 'wind_speed', 'humidity']
+
+# month is 1..12 and dayofweek is 0..6, so the cyclical encodings come from
+# tiny precomputed tables instead of fresh sin/cos calls per request.
+_MONTH_SIN = np.sin(2 * np.pi * np.arange(13) / 12)
+_MONTH_COS = np.cos(2 * np.pi * np.arange(13) / 12)
+_DAY_OF_WEEK_SIN = np.sin(2 * np.pi * np.arange(7) / 7)
+_DAY_OF_WEEK_COS = np.cos(2 * np.pi * np.arange(7) / 7)
+
+# The rolling stats are a tight numeric kernel, so JIT-compile them with Numba
+# when it is installed. The plain-Python fallback keeps numba optional — it is
+# deliberately not in requirements.txt since the deployed API works without it.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def passthrough(func):
+            return func
+        return passthrough
+
+
+@njit(cache=True)
+def _tail_mean_std(arr, window):
+    """Mean and sample std-dev (ddof=1) over the last `window` values of `arr`."""
+    tail = arr[-window:]
+    mean = tail.mean()
+    squared_error = 0.0
+    for value in tail:
+        squared_error += (value - mean) ** 2
+    return mean, (squared_error / (window - 1)) ** 0.5
+
+
+# Warm-up call so the one-off JIT compile (or cached load) happens at import
+# time instead of inside the first request.
+_tail_mean_std(np.zeros(8), 3)
+
+
+def create_features_for_single_day(forecast_values, history, calendar_features):
     """
     Creates ALL features for a single future day using historical context.
+    `forecast_values` is a plain dict of the day's forecast columns,
+    `history` is a dict of plain NumPy arrays (newest value last), so the lag
+    and rolling lookups are cheap array slices instead of pandas operations.
+    `calendar_features` holds the precomputed date-derived features for the day.
     """
     features = {}
-    
+
     # 1. Add the forecast data for the day
-    features.update(forecast_row.to_dict())
-    
-    # 2. Add base features (lags, time)
-    for i in range(1, 8):
-        features[f'aqi_lag_{i}'] = history_df['aqi'].iloc[-i]
-    
-    date_to_predict = forecast_row.name
-    features['day_of_year'] = date_to_predict.dayofyear
-    
+    features.update(forecast_values)
+
+    # 2. Add base features (lags, time) — the lag count is fixed at 7, so the
+    # loop (and its per-iteration f-string formatting) is simply unrolled.
+    aqi_hist = history['aqi']
+    features['aqi_lag_1'] = aqi_hist[-1]
+    features['aqi_lag_2'] = aqi_hist[-2]
+    features['aqi_lag_3'] = aqi_hist[-3]
+    features['aqi_lag_4'] = aqi_hist[-4]
+    features['aqi_lag_5'] = aqi_hist[-5]
+    features['aqi_lag_6'] = aqi_hist[-6]
+    features['aqi_lag_7'] = aqi_hist[-7]
+
+    features.update(calendar_features)
+
     # 3. Add advanced features (rolling, interactions, cyclical)
+    # Because the model was trained with shift(1), the rolling window for the
+    # day being predicted ends at the last *historical* value — so each stat
+    # is just a reduction over the tail of the history array.
     window_sizes = [3, 7]
-    cols_to_roll = ['aqi', 'pm25', 'carbon_monoxide', 'wind_speed', 'humidity']
-    
-    temp_df_for_rolling = pd.concat([history_df, pd.DataFrame(forecast_row).T])
 
     for window in window_sizes:
-        for col in cols_to_roll:
-            features[f'{col}_rolling_mean_{window}'] = temp_df_for_rolling[col].shift(1).rolling(window=window).mean().iloc[-1]
-            features[f'{col}_rolling_std_{window}'] = temp_df_for_rolling[col].shift(1).rolling(window=window).std().iloc[-1]
+        for col in ROLLING_COLS:
+            mean, std = _tail_mean_std(history[col], window)
+            features[f'{col}_rolling_mean_{window}'] = mean
+            features[f'{col}_rolling_std_{window}'] = std
 
     features['pm25_x_wind_interaction'] = features['pm25'] / (features['wind_speed'] + 1)
     features['temp_x_humidity_interaction'] = features['temperature'] * features['humidity']
-    
-    features['month_sin'] = np.sin(2 * np.pi * date_to_predict.month / 12)
-    features['month_cos'] = np.cos(2 * np.pi * date_to_predict.month / 12)
-    features['day_of_week_sin'] = np.sin(2 * np.pi * date_to_predict.dayofweek / 7)
-    features['day_of_week_cos'] = np.cos(2 * np.pi * date_to_predict.dayofweek / 7)
-    
+
     return features
 
 def generate_full_response():
     """
     Loads data and the champion model, generates a 3-day forecast, and returns the result.
     """
+    global _FEATURE_COVERAGE_CHECKED
+
     print("\n====== STARTING FULL RESPONSE GENERATION ======")
     try:
-        
-        model = joblib.load(MODEL_FILE)
-        df_historical = pd.read_csv(HISTORICAL_DATA_FILE, parse_dates=['timestamp'])
+
+        model, df_historical = get_cached_model_and_history()
     except FileNotFoundError as e:
         return {"error": f"Missing required file: {e}. Ensure 'models' and 'data' directories are in the project root."}
 
-    #1: Get Today's Most Recent AQI
-    latest_data = df_historical.sort_values('timestamp').iloc[-1]
+    #1: Get Today's Most Recent AQI (history is already sorted by timestamp)
+    latest_data = df_historical.iloc[-1]
     today_aqi_data = {
         "date": latest_data['timestamp'].strftime('%Y-%m-%d'),
         "aqi": round(latest_data['aqi'])
@@ -133,27 +346,82 @@ def generate_full_response():
         return {"error": "Could not retrieve future weather forecast."}
     
     #3: Generate the 3-day AQI Forecast, is done iteratively (IMP)
-    live_history = df_historical.sort_values('timestamp').tail(10).copy()
-    MODEL_FEATURES = model.feature_names_in_
-    
+    # Keep the recent history as small NumPy arrays instead of a DataFrame —
+    # only the tail is ever read, and appending a predicted day to an array is
+    # far cheaper than pd.concat re-copying the whole frame every iteration.
+    live_history = df_historical.iloc[-10:]
+
+    # Preallocate each history buffer with room for the whole forecast horizon
+    # so appending a predicted day is an in-place write instead of np.append
+    # reallocating the array every iteration. `history` holds growing views
+    # over the buffers, so the tail slicing below stays unchanged.
+    n_hist = len(live_history)
+    buffers = {col: np.empty(n_hist + len(future_data), dtype=np.float64) for col in ROLLING_COLS}
+    history = {}
+    for col in ROLLING_COLS:
+        buffers[col][:n_hist] = live_history[col].to_numpy(dtype=np.float64)
+        history[col] = buffers[col][:n_hist]
+
+    # One reusable feature vector in the model's column order — filling it by
+    # precomputed index is much cheaper than building a one-row DataFrame and
+    # reindexing its columns on every iteration.
+    feature_vector = np.empty(len(_MODEL_FEATURES), dtype=np.float64)
+
+    # The calendar features depend only on the forecast dates, so compute them
+    # for all days in one vectorized pass over the DatetimeIndex up front.
+    future_index = future_data.index
+    day_of_year = future_index.dayofyear.to_numpy()
+    month = future_index.month.to_numpy()
+    day_of_week = future_index.dayofweek.to_numpy()
+    month_sin = _MONTH_SIN[month]
+    month_cos = _MONTH_COS[month]
+    day_of_week_sin = _DAY_OF_WEEK_SIN[day_of_week]
+    day_of_week_cos = _DAY_OF_WEEK_COS[day_of_week]
+
     predictions = []
-    for date_to_predict, forecast_row in future_data.iterrows():
-        
-        features = create_features_for_single_day(forecast_row, live_history)
-        features_df = pd.DataFrame([features])[MODEL_FEATURES]
-        predicted_aqi = model.predict(features_df)[0]
-        
+    forecast_cols = list(future_data.columns)
+    # itertuples hands back plain named tuples instead of boxing every row
+    # into a fresh Series the way iterrows does.
+    for day, row in enumerate(future_data.itertuples(index=True)):
+
+        date_to_predict = row.Index
+        forecast_values = dict(zip(forecast_cols, row[1:]))
+        calendar_features = {
+            'day_of_year': day_of_year[day],
+            'month_sin': month_sin[day],
+            'month_cos': month_cos[day],
+            'day_of_week_sin': day_of_week_sin[day],
+            'day_of_week_cos': day_of_week_cos[day],
+        }
+        features = create_features_for_single_day(forecast_values, history, calendar_features)
+        if not _FEATURE_COVERAGE_CHECKED:
+            # The feature list is maintained both here and in train_model.py,
+            # so fail loudly (like the old column reindex did) if they ever
+            # drift — otherwise a never-assigned slot in the reused vector
+            # would quietly feed garbage to the model. Checking once per
+            # loaded model is enough: the builder's keys are data-independent.
+            missing = [name for name in _MODEL_FEATURES if name not in features]
+            if missing:
+                raise RuntimeError(f"Feature builder did not produce model feature(s): {missing}")
+            _FEATURE_COVERAGE_CHECKED = True
+        for name, value in features.items():
+            idx = _FEATURE_INDEX.get(name)
+            if idx is not None:
+                feature_vector[idx] = value
+        predicted_aqi = predict_single_day(model, feature_vector)
+
         predictions.append({
             "date": date_to_predict.strftime('%Y-%m-%d'),
             "predicted_aqi": round(predicted_aqi)
         })
-        
-        new_row_data = forecast_row.to_dict()
-        new_row_data['aqi'] = predicted_aqi
-        new_row_df = pd.DataFrame([new_row_data], index=[date_to_predict])
-        
-        live_history = pd.concat([live_history, new_row_df])
-        
+
+        # Extend the history arrays with the day we just predicted so the next
+        # iteration's lags and rolling windows can see it.
+        forecast_values['aqi'] = predicted_aqi
+        for col in ROLLING_COLS:
+            buffers[col][n_hist + day] = forecast_values[col]
+            history[col] = buffers[col][:n_hist + day + 1]
+
     #Assemble the Final Response 
     final_response = {
         "today": today_aqi_data,
@@ -170,15 +438,21 @@ def get_status():
     Provides the status of the API and the last update time of the model.
     """
     try:
-        
+        now = time.time()
+        if _STATUS_CACHE['response'] is not None and now < _STATUS_CACHE['expires']:
+            return _STATUS_CACHE['response']
+
         mod_time_unix = os.path.getmtime(MODEL_FILE)
         # Convert it to a human-readable UTC datetime object
         last_updated_dt = datetime.fromtimestamp(mod_time_unix, tz=timezone.utc)
 
-        return {
+        response = {
             "status": "online",
             "model_last_updated_utc": last_updated_dt.isoformat()
         }
+        _STATUS_CACHE['response'] = response
+        _STATUS_CACHE['expires'] = now + STATUS_CACHE_TTL_SECONDS
+        return response
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model file not found.")
     except Exception as e:
@@ -186,20 +460,29 @@ def get_status():
 
 
 @app.get("/api/forecast")
-def get_aqi_forecast():
+async def get_aqi_forecast():
     """
     This endpoint runs the complete prediction pipeline to get today's
     AQI value and a 3-day future forecast.
+    The pipeline itself is blocking (requests + model.predict), so it is
+    pushed onto the threadpool to keep the event loop free for other
+    requests (cache hits return without touching the pool at all).
     """
     print("--- Received request for /forecast ---")
-    
-    
-    response_data = generate_full_response()
-    
-    
+
+    now = time.time()
+    if _FORECAST_CACHE['response'] is not None and now < _FORECAST_CACHE['expires']:
+        print("--- Serving /forecast from cache ---")
+        return _FORECAST_CACHE['response']
+
+    response_data = await run_in_threadpool(generate_full_response)
+
     if "error" in response_data:
+        # Errors are never cached, so the next hit retries the full pipeline.
         raise HTTPException(status_code=500, detail=response_data["error"])
-        
+
+    _FORECAST_CACHE['response'] = response_data
+    _FORECAST_CACHE['expires'] = now + FORECAST_CACHE_TTL_SECONDS
     return response_data
 
 @app.get("/api")
@@ -1,11 +1,27 @@
+import os
 import pandas as pd
 import sys
 
 # --- Configuration ---
 MAIN_HISTORICAL_FILE = "data/karachi_daily_data_5_years.csv"
+# Parquet is the primary on-disk format now: it is columnar, compressed and
+# keeps the timestamp dtype, so reloading it skips the whole CSV tokenizer.
+MAIN_HISTORICAL_PARQUET = "data/karachi_daily_data_5_years.parquet"
 NEW_DAILY_DATA_FILE = "data/last_7_days_daily_data.csv"
+NEW_DAILY_PARQUET_FILE = "data/last_7_days_daily_data.parquet"
 TIMEZONE = 'Asia/Karachi' # Define timezone as a constant for consistency
 
+
+def standardize_timezone(timestamps):
+    """
+    Returns the timestamp column as tz-aware in the project timezone, whether
+    it was read back naive (fresh CSV) or already carrying a UTC offset.
+    """
+    timestamps = pd.to_datetime(timestamps)
+    if timestamps.dt.tz is None:
+        return timestamps.dt.tz_localize(TIMEZONE)
+    return timestamps.dt.tz_convert(TIMEZONE)
+
 def append_and_clean_historical_data(main_file, new_data_file):
     """
     Efficiently appends new daily data to the main historical dataset.
@@ -18,16 +34,15 @@ def append_and_clean_historical_data(main_file, new_data_file):
 
     # --- Step 1: Load the main historical dataset ---
     try:
-        df_main = pd.read_csv(main_file, parse_dates=['timestamp'])
-        
-        # === FIX 1: LOCALIZE THE MAIN DATAFRAME'S TIMESTAMP ===
-        # If the timestamp column is naive, assign the correct timezone.
-        # If it's already aware, this will correctly convert it.
-        if df_main['timestamp'].dt.tz is None:
-            df_main['timestamp'] = df_main['timestamp'].dt.tz_localize(TIMEZONE)
+        # Prefer the Parquet copy when it exists; fall back to the CSV the
+        # first time this runs (which acts as the one-shot migration).
+        if os.path.exists(MAIN_HISTORICAL_PARQUET):
+            df_main = pd.read_parquet(MAIN_HISTORICAL_PARQUET)
         else:
-            df_main['timestamp'] = df_main['timestamp'].dt.tz_convert(TIMEZONE)
-            
+            df_main = pd.read_csv(main_file, parse_dates=['timestamp'])
+
+        df_main['timestamp'] = standardize_timezone(df_main['timestamp'])
+
         print(f"Loaded and standardized {len(df_main)} records from the main historical file.")
     except FileNotFoundError:
         print(f"!!! ERROR: New daily data file '{new_data_file}' not found. Aborting.")
@@ -35,14 +50,14 @@ def append_and_clean_historical_data(main_file, new_data_file):
 
     # --- Step 2: Load the new daily data ---
     try:
-        df_new = pd.read_csv(new_data_file, parse_dates=['timestamp'])
-        
-        # === FIX 2: LOCALIZE THE NEW DATAFRAME'S TIMESTAMP (just in case) ===
-        # This ensures the new data is also tz-aware before concatenation.
-        if df_new['timestamp'].dt.tz is None:
-            df_new['timestamp'] = df_new['timestamp'].dt.tz_localize(TIMEZONE)
+        # Prefer the parquet copy hourly_to_daily.py writes (dtypes intact,
+        # no CSV parsing); the timestamp comes back as the index there, so
+        # pull it out into a column. The CSV remains the fallback.
+        if os.path.exists(NEW_DAILY_PARQUET_FILE):
+            df_new = pd.read_parquet(NEW_DAILY_PARQUET_FILE).reset_index()
         else:
-            df_new['timestamp'] = df_new['timestamp'].dt.tz_convert(TIMEZONE)
+            df_new = pd.read_csv(new_data_file, parse_dates=['timestamp'])
+        df_new['timestamp'] = standardize_timezone(df_new['timestamp'])
 
         print(f"Loaded and standardized {len(df_new)} new daily records to be merged.")
     except FileNotFoundError:
@@ -53,16 +68,21 @@ def append_and_clean_historical_data(main_file, new_data_file):
     print("Combining datasets and removing duplicates...")
     
     # Now that both dataframes have tz-aware timestamps, this is safe.
-    df_combined = pd.concat([df_main, df_new], ignore_index=True)
-    
-    df_final = df_combined.sort_values('timestamp').drop_duplicates(subset=['timestamp'], keep='last')
-    
+    df_combined = pd.concat([df_main, df_new], ignore_index=True, copy=False)
+
+    # De-duplicate first (hash-based, keeps the newer row since df_new was
+    # concatenated last), then do one stable sort over the surviving rows.
+    df_final = df_combined.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp', kind='mergesort', ignore_index=True)
+
     print(f"-> Combined records: {len(df_combined)}")
     print(f"-> Records after de-duplication: {len(df_final)}")
     
     # --- Step 4: Save the updated historical dataset ---
+    # Parquet is what the API and future runs of this script read; the CSV is
+    # still written alongside it for anything that hasn't moved over yet.
+    df_final.to_parquet(MAIN_HISTORICAL_PARQUET, compression='zstd', index=False)
     df_final.to_csv(main_file, index=False)
-    
+
     print(f"\n✅ --- SUCCESS --- ✅")
     print(f"Main historical dataset '{main_file}' has been updated.")
     print(f"It now contains {len(df_final)} clean, unique daily records.")
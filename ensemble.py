@@ -0,0 +1,25 @@
+# Shared home for the ensemble wrapper so the pickled model records a stable
+# module path ("ensemble.WeightedEnsemble"). If the class lived inside
+# train_model.py it would be pickled as __main__.WeightedEnsemble whenever CI
+# runs `python train_model.py`, and the API process would then fail to
+# unpickle the artifact. Both train_model.py and api/index.py import it from
+# here.
+
+import numpy as np
+
+
+class WeightedEnsemble:
+    """
+    A thin weighted-average wrapper around already-fitted estimators.
+    Compared to VotingRegressor this skips the clone-and-refit machinery
+    (the members are trained directly, in parallel) and pickles to a much
+    smaller, faster-loading artifact — it holds nothing but the fitted
+    models and their weights.
+    """
+    def __init__(self, estimators, weights):
+        self.estimators = estimators  # list of (name, fitted_model) tuples
+        self.weights = np.asarray(weights)
+
+    def predict(self, X):
+        predictions = np.column_stack([model.predict(X) for _, model in self.estimators])
+        return np.average(predictions, axis=1, weights=self.weights)
@@ -5,13 +5,16 @@
 # We have to do this as Open-Meteo.com only gives us hourly data, so I had to code this to aggregate the hourly data to daily data.
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import sys
 
 # NEVER USE \ IN THE FILE PATHS. IT WILL WORK ON WINDOWS BUT NOT ON LINUX. SO B/C OF THIS THE PIPELINE FAILS
 # SMOLL CHANGE CAUSED BIG FAILURE
 # --- Configuration ---
-HOURLY_DATA_FILE = "data/last_7_days_hourly_data.csv"
+HOURLY_DATA_FILE = "data/last_7_days_hourly_data.csv.gz"
 DAILY_DATA_FILE = "data/last_7_days_daily_data.csv"
+DAILY_PARQUET_FILE = "data/last_7_days_daily_data.parquet"
 
 # --- Main Processing ---
 def process_hourly_to_daily_correctly(input_file, output_file):
@@ -33,26 +36,30 @@ def process_hourly_to_daily_correctly(input_file, output_file):
 
     print("\nProcessing daily aggregations...")
 
-    # 1. Calculate the daily MEAN for pollutants and weather data
-    # This is the correct method for these linear values.
-    daily_means = df_hourly.drop(columns=['aqi']).resample('D').mean()
-    print("-> Calculated daily means for pollutants and weather.")
+    # 1. Aggregate everything in ONE pass over the frame:
+    #    - daily MEAN for pollutants and weather (correct for linear values)
+    #    - daily MAXIMUM for AQI (more meaningful than averaging the index)
+    # A single groupby on the calendar day replaces the old
+    # drop-column/resample-mean + resample-max + concat chain, which scanned
+    # the full frame twice and copied it to drop the aqi column.
+    agg_map = {col: 'mean' for col in df_hourly.columns if col != 'aqi'}
+    agg_map['aqi'] = 'max'
+    df_daily_final = df_hourly.groupby(df_hourly.index.floor('D')).agg(agg_map)
+    df_daily_final.index.name = 'timestamp'
+    print("-> Calculated daily means (pollutants/weather) and daily max AQI.")
 
-    # 2. Calculate the daily MAXIMUM for the AQI column
-    # This is a more meaningful representation than a simple average of the index.
-    daily_max_aqi = df_hourly['aqi'].resample('D').max()
-    print("-> Calculated daily maximum for AQI.")
-
-    # 3. Combine the results
-    # We now have the mean of the raw data and the max of the index.
-    df_daily_final = pd.concat([daily_means, daily_max_aqi], axis=1)
-
-    # 4. Clean up
+    # 2. Clean up
     # Remove any days that might have no data (e.g., if there was a gap in the source)
     df_daily_final.dropna(inplace=True)
 
-    # Save the correctly processed daily data to a new CSV
-    df_daily_final.to_csv(output_file)
+    # Save the correctly processed daily data. Parquet is the fast path for
+    # the downstream pipeline (binary columns, dtypes preserved, no text
+    # parsing on load); the CSV is kept alongside for anything external that
+    # still expects it.
+    df_daily_final.to_parquet(DAILY_PARQUET_FILE, compression='zstd')
+    # Arrow's C++ CSV writer is much faster than pandas' Python-level one;
+    # reset_index keeps the timestamp column in the file like to_csv did.
+    pacsv.write_csv(pa.Table.from_pandas(df_daily_final.reset_index()), output_file)
 
     print(f"\n✅ --- SUCCESS --- ✅")
     print(f"Correctly processed daily data has been saved to '{output_file}'")